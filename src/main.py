@@ -1,19 +1,10 @@
-import importlib
+import models
+import preprocess
 
-def run_scripts_in_order(scripts):
-    for script in scripts:
-        if script != 'main.py' and script.endswith('.py'):
-            module_name = script[:-3]
-            print(f"Running {script}...")
-            module = importlib.import_module(module_name)
-            if hasattr(module, 'main'):
-                module.main()
-            else:
-                print(f"No main() function found in {script}")
+# models runs first, later stages build on its DataManager
+STAGES = (models.main, preprocess.main)
 
 if __name__ == "__main__":
-    scripts_to_run = [
-        'models.py', 
-        'preprocess.py',
-    ]
-    run_scripts_in_order(scripts_to_run)
\ No newline at end of file
+    for stage in STAGES:
+        print(f"Running {stage.__module__}.py...")
+        stage()
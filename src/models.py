@@ -4,20 +4,63 @@ This file contains a model for data storage and data accessing.
 
 
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+from pyarrow import feather
 from typing import Optional, Dict, List, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
 import re
 
 
+class LRUCache(OrderedDict):
+    """
+    Dictionary holding at most maxsize entries.
+    The least recently used entry is evicted when the limit is exceeded.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
 class DataManager:
     """
     Manages the loading and caching of dataset files.
     Uses lazy loading and selective merging for memory efficiency.
     """
 
-    def __init__(self):
+    def __init__(self, memory_map: bool = False):
+        """
+        Initialise the DataManager.
+
+        Args:
+            memory_map: Read the Feather cache through a memory map, so worker
+                processes share the cached pages instead of holding private
+                copies. Numeric columns of the loaded tables are then read-only.
+        """
+        self.memory_map = memory_map
+
+        # Getters return views of the loaded tables, copy-on-write keeps
+        # callers' edits from reaching them (always on from pandas 3)
+        if int(pd.__version__.split(".")[0]) < 3:
+            pd.set_option("mode.copy_on_write", True)
+
         cur_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.data_path = os.path.join(cur_dir, "data/raw_data") + os.sep
+        self.cache_path = os.path.join(cur_dir, "data/cache") + os.sep
 
         self._households = None
         self._persons = None
@@ -26,32 +69,290 @@ class DataManager:
         self._journey_work = None
         self._journey_education = None
 
-        self._cache = {}
+        # Row positions of each destination purpose, built on first use
+        self._trips_purpose_idx = None
+        self._stops_purpose_idx = None
+
+        # Persons and households indexed by their id, built on first use
+        self._persons_by_id = None
+        self._households_by_id = None
+        self._persons_households = None
+
+        # Category dtypes shared by same-named columns across datasets
+        self._shared_dtypes = {}
+
+        # Merged results, bounded so long running pipelines do not grow unbounded
+        self._cache = LRUCache(maxsize=8)
 
         self.dataset_info = {
-            "households": {"file": "households.csv", "id": "hhid"},
-            "persons": {"file": "persons.csv", "id": "persid"},
-            "trips": {"file": "trips.csv", "id": "tripid"},
-            "stops": {"file": "stops.csv", "id": "stopid"},
+            "households": {
+                "file": "households.csv",
+                "id": "hhid",
+                "sort": "hhid",
+                "dtypes": {
+                    "hhsize": "int16",
+                    "totalvehs": "int16",
+                    "dwelltype": "category",
+                    "homelga": "category",
+                },
+            },
+            "persons": {
+                "file": "persons.csv",
+                "id": "persid",
+                "sort": "persid",
+                "dtypes": {
+                    "persno": "int16",
+                    "agegroup": "category",
+                    "sex": "category",
+                    "carlicence": "category",
+                    "emptype": "category",
+                    "anzsic1": "category",
+                },
+            },
+            "trips": {
+                "file": "trips.csv",
+                "id": "tripid",
+                "sort": "persid",
+                "dtypes": {
+                    "tripno": "int16",
+                    "starthour": "int32",
+                    "startime": "int32",
+                    "arrhour": "int32",
+                    "arrtime": "int32",
+                    "duration": "int32",
+                    "destpurp1": "category",
+                },
+            },
+            "stops": {
+                "file": "stops.csv",
+                "id": "stopid",
+                "dtypes": {
+                    "stopno": "int16",
+                    "starthour": "int32",
+                    "arrhour": "int32",
+                    "startime": "int32",
+                    "arrtime": "int32",
+                    "mainmode": "category",
+                    "destpurp1": "category",
+                },
+            },
             "journey_work": {
                 "file": "journey_to_work.csv",
-                "id": "persid"
+                "id": "persid",
+                "dtypes": {
+                    "start_time": "int32",
+                    "journey_travel_time": "int32",
+                },
             },
             "journey_education": {
                 "file": "journey_to_education.csv",
-                "id": "persid"
+                "id": "persid",
+                "dtypes": {
+                    "start_time": "int32",
+                    "journey_travel_time": "int32",
+                },
             },
         }
 
+    def _read_csv(self, dataset: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read a dataset file with the pyarrow parser and its declared dtypes.
+        Args:
+            dataset (str): Name of the dataset (e.g., 'households', 'persons').
+            columns (Optional[List[str]]): Subset of columns to read, or None for all.
+
+        Returns:
+            pd.DataFrame: DataFrame parsed from the dataset file.
+        """
+        info = self.dataset_info[dataset]
+        dtypes = info["dtypes"]
+        if columns is not None:
+            dtypes = {col: dtype for col, dtype in dtypes.items() if col in columns}
+
+        df = pd.read_csv(
+            self.data_path + info["file"],
+            usecols=columns,
+            dtype=dtypes,
+            engine="pyarrow",
+        )
+        return self._categorise_low_cardinality(df)
+
+    @staticmethod
+    def _categorise_low_cardinality(
+        df: pd.DataFrame, max_ratio: float = 0.05
+    ) -> pd.DataFrame:
+        """
+        Convert string columns not covered by the dtype schema to category
+        when they have few distinct values relative to the number of rows.
+        Columns holding numbers mixed with labels such as "Missing" are kept as is.
+        Args:
+            df (pd.DataFrame): DataFrame to convert in place.
+            max_ratio (float): Largest distinct values to rows ratio to convert.
+
+        Returns:
+            pd.DataFrame: The converted DataFrame.
+        """
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            if pd.api.types.infer_dtype(df[col], skipna=True) != "string":
+                continue
+
+            values = df[col].dropna().unique()
+            if len(values) > max_ratio * len(df):
+                continue
+            if pd.to_numeric(pd.Series(values), errors="coerce").notna().any():
+                continue
+
+            df[col] = df[col].astype("category")
+        return df
+
+    def _fresh_cache_path(self, dataset: str) -> Optional[str]:
+        """
+        Return the Feather cache path of a dataset if it is newer than its CSV
+        and than this module, which defines the dtypes and sort order.
+        """
+        csv_path = self.data_path + self.dataset_info[dataset]["file"]
+        cache_path = self.cache_path + dataset + ".feather"
+
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= max(
+            os.path.getmtime(csv_path), os.path.getmtime(__file__)
+        ):
+            return cache_path
+        return None
+
+    @staticmethod
+    def _read_cache(
+        cache_path: str, columns: Optional[List[str]] = None, memory_map: bool = False
+    ) -> pd.DataFrame:
+        """
+        Read a Feather cache file.
+        By default the frame is writable and the file is not held open afterwards.
+        With memory_map, numeric columns stay backed by the mapped file and are
+        read-only, and the file stays open while they are alive.
+        Args:
+            cache_path (str): Path of the Feather file.
+            columns (Optional[List[str]]): Subset of columns to read, or None for all.
+            memory_map (bool): Whether to map the file instead of reading it.
+
+        Returns:
+            pd.DataFrame: DataFrame read from the cache.
+        """
+        table = feather.read_table(cache_path, columns=columns, memory_map=memory_map)
+        if memory_map:
+            return table.to_pandas(split_blocks=True)
+        return table.to_pandas()
+
+    def _load_dataset(self, dataset: str) -> pd.DataFrame:
+        """
+        Load a full dataset, reusing its Feather cache when it is newer than the CSV.
+        Args:
+            dataset (str): Name of the dataset (e.g., 'households', 'persons').
+
+        Returns:
+            pd.DataFrame: DataFrame of the full dataset.
+        """
+        cache_path = self._fresh_cache_path(dataset)
+        if cache_path is not None:
+            return self._read_cache(cache_path, memory_map=self.memory_map)
+
+        cache_path = self.cache_path + dataset + ".feather"
+        df = self._read_csv(dataset)
+
+        # Sort by the merge key so joins on it see a monotonic index
+        sort_col = self.dataset_info[dataset].get("sort")
+        if sort_col is not None:
+            df = df.sort_values(sort_col, kind="mergesort").reset_index(drop=True)
+
+        # Uncompressed and in one record batch so columns can be mapped without
+        # copying, replaced atomically so an existing mapping is never truncated
+        os.makedirs(self.cache_path, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False).combine_chunks()
+        feather.write_feather(
+            table,
+            cache_path + ".tmp",
+            compression="uncompressed",
+            chunksize=max(len(table), 1),
+        )
+        os.replace(cache_path + ".tmp", cache_path)
+        return self._read_cache(cache_path, memory_map=self.memory_map)
+
+    def prefetch_all(self, datasets: Optional[List[str]] = None) -> None:
+        """
+        Load several datasets concurrently, the parsers release the GIL while reading.
+        Datasets that are already loaded are skipped, the lazy properties
+        still load anything that was not prefetched.
+        Args:
+            datasets (Optional[List[str]]): Names of the datasets to load, or None for all.
+        """
+        if datasets is None:
+            datasets = list(self.dataset_info)
+
+        for dataset in datasets:
+            if dataset not in self.dataset_info:
+                raise ValueError(f"Dataset {dataset} not recognized.")
+
+        datasets = [name for name in datasets if getattr(self, f"_{name}") is None]
+        if not datasets:
+            return
+
+        print(f"Prefetching {datasets}...")
+        with ThreadPoolExecutor(max_workers=len(datasets)) as executor:
+            futures = {name: executor.submit(self._load_dataset, name) for name in datasets}
+            for name, future in futures.items():
+                setattr(self, f"_{name}", future.result())
+                print(f"Loaded {len(getattr(self, f'_{name}'))} {name} records.")
+
+        self._align_categories()
+
+    def _align_categories(self) -> None:
+        """
+        Give each categorical column name in the loaded datasets one
+        CategoricalDtype over the union of its categories in all of them, so
+        joins and comparisons across datasets work on the same integer codes.
+        Runs after prefetch_all and after each lazy load, columns read with
+        load_columns are not aligned.
+        Frames derived from the recast datasets are dropped and rebuilt on use.
+        """
+        loaded = {
+            name: getattr(self, f"_{name}")
+            for name in self.dataset_info
+            if getattr(self, f"_{name}") is not None
+        }
+
+        categories = {}
+        for df in loaded.values():
+            for col in df.columns:
+                if isinstance(df[col].dtype, pd.CategoricalDtype):
+                    known = categories.get(col, pd.Index([]))
+                    categories[col] = known.union(df[col].cat.categories)
+
+        self._shared_dtypes = {
+            col: pd.CategoricalDtype(values) for col, values in categories.items()
+        }
+
+        changed = False
+        for df in loaded.values():
+            for col in df.columns:
+                shared = self._shared_dtypes.get(col)
+                if shared is not None and df[col].dtype != shared:
+                    df[col] = df[col].astype(shared)
+                    changed = True
+
+        if changed:
+            self._persons_by_id = None
+            self._households_by_id = None
+            self._persons_households = None
+            self._cache.clear()
+
     @property
     def households(self) -> pd.DataFrame:
         """Lazy load households data."""
         if self._households is None:
             print("Loading households data...")
-            self._households = pd.read_csv(
-                self.data_path + self.dataset_info["households"]["file"]
-            )
+            self._households = self._load_dataset("households")
             print(f"Loaded {len(self._households)} households records.")
+            self._align_categories()
         return self._households
 
     @property
@@ -59,10 +360,9 @@ class DataManager:
         """Lazy load persons data."""
         if self._persons is None:
             print("Loading persons data...")
-            self._persons = pd.read_csv(
-                self.data_path + self.dataset_info["persons"]["file"]
-            )
+            self._persons = self._load_dataset("persons")
             print(f"Loaded {len(self._persons)} persons records.")
+            self._align_categories()
         return self._persons
 
     @property
@@ -70,10 +370,9 @@ class DataManager:
         """Lazy load trips data."""
         if self._trips is None:
             print("Loading trips data...")
-            self._trips = pd.read_csv(
-                self.data_path + self.dataset_info["trips"]["file"]
-            )
+            self._trips = self._load_dataset("trips")
             print(f"Loaded {len(self._trips)} trips records.")
+            self._align_categories()
         return self._trips
 
     @property
@@ -81,10 +380,9 @@ class DataManager:
         """Lazy load stops data."""
         if self._stops is None:
             print("Loading stops data...")
-            self._stops = pd.read_csv(
-                self.data_path + self.dataset_info["stops"]["file"]
-            )
+            self._stops = self._load_dataset("stops")
             print(f"Loaded {len(self._stops)} stops records.")
+            self._align_categories()
         return self._stops
 
     @property
@@ -92,10 +390,9 @@ class DataManager:
         """Lazy load journey to work data."""
         if self._journey_work is None:
             print("Loading journey to work data...")
-            self._journey_work = pd.read_csv(
-                self.data_path + self.dataset_info["journey_work"]["file"]
-            )
+            self._journey_work = self._load_dataset("journey_work")
             print(f"Loaded {len(self._journey_work)} journey to work records.")
+            self._align_categories()
         return self._journey_work
 
     @property
@@ -103,14 +400,148 @@ class DataManager:
         """Lazy load journey to education data."""
         if self._journey_education is None:
             print("Loading journey to education data...")
-            self._journey_education = pd.read_csv(
-                self.data_path + self.dataset_info["journey_education"]["file"]
-            )
+            self._journey_education = self._load_dataset("journey_education")
             print(
                 f"Loaded {len(self._journey_education)} journey to education records."
             )
+            self._align_categories()
         return self._journey_education
 
+    @property
+    def _trips_idx(self) -> Dict[str, np.ndarray]:
+        """Lazy build row positions of trips grouped by destination purpose."""
+        if self._trips_purpose_idx is None:
+            self._trips_purpose_idx = self.trips.groupby(
+                "destpurp1", sort=False, observed=True
+            ).indices
+        return self._trips_purpose_idx
+
+    @property
+    def _stops_idx(self) -> Dict[str, np.ndarray]:
+        """Lazy build row positions of stops grouped by destination purpose."""
+        if self._stops_purpose_idx is None:
+            self._stops_purpose_idx = self.stops.groupby(
+                "destpurp1", sort=False, observed=True
+            ).indices
+        return self._stops_purpose_idx
+
+    @property
+    def _persons_indexed(self) -> pd.DataFrame:
+        """Lazy build persons data indexed by persid for joins."""
+        if self._persons_by_id is None:
+            self._persons_by_id = self.persons.set_index("persid")
+        return self._persons_by_id
+
+    @property
+    def _households_indexed(self) -> pd.DataFrame:
+        """Lazy build households data indexed by hhid for joins."""
+        if self._households_by_id is None:
+            self._households_by_id = self.households.set_index("hhid")
+        return self._households_by_id
+
+    @property
+    def _persons_with_hh(self) -> pd.DataFrame:
+        """
+        Lazy build persons data joined with their household data, indexed by persid.
+        Household level columns repeated in persons are taken from households.
+        """
+        if self._persons_households is None:
+            households = self._households_indexed
+            persons = self._persons_indexed.drop(
+                columns=households.columns.intersection(self._persons_indexed.columns)
+            )
+            self._persons_households = persons.join(
+                households, on="hhid", how="left", validate="m:1"
+            )
+        return self._persons_households
+
+    def _read_filtered_csv(
+        self,
+        dataset: str,
+        filter_col: str,
+        filter_vals: List[str],
+        chunksize: int = 500_000,
+    ) -> pd.DataFrame:
+        """
+        Read the rows of a dataset whose filter column is in filter_vals,
+        one chunk at a time, so peak memory is bounded by the chunk size.
+        Args:
+            dataset (str): Name of the dataset (e.g., 'trips', 'stops').
+            filter_col (str): Column to filter on.
+            filter_vals (List[str]): Values of filter_col to keep.
+            chunksize (int): Number of rows parsed per chunk.
+
+        Returns:
+            pd.DataFrame: DataFrame of the matching rows.
+        """
+        info = self.dataset_info[dataset]
+        reader = pd.read_csv(
+            self.data_path + info["file"],
+            dtype=info["dtypes"],
+            chunksize=chunksize,
+            low_memory=False,
+        )
+        chunks = [chunk[chunk[filter_col].isin(filter_vals)] for chunk in reader]
+
+        df = pd.concat(chunks)
+
+        # Each chunk infers its own types, a column holding labels such as
+        # "Missing" in one chunk is read as strings in all of them
+        for col in df.columns:
+            col_dtypes = {chunk[col].dtype for chunk in chunks}
+            if len(col_dtypes) > 1 and df[col].dtype == object:
+                df[col] = df[col].where(df[col].isna(), df[col].astype(str)).infer_objects()
+
+        for col, dtype in info["dtypes"].items():
+            if dtype == "category":
+                df[col] = df[col].astype("category")
+
+        sort_col = info.get("sort")
+        if sort_col is not None:
+            df = df.sort_values(sort_col, kind="mergesort")
+
+        return self._categorise_low_cardinality(df)
+
+    def _purpose_trips(self, purpose: str) -> pd.DataFrame:
+        """
+        Get the trips with the given destination purpose.
+        When trips are neither loaded nor cached, only the matching rows
+        are kept while reading the CSV, and they are reused until evicted.
+        Args:
+            purpose (str): Value of destpurp1 to select.
+
+        Returns:
+            pd.DataFrame: DataFrame of the matching trips.
+        """
+        if self._trips is None and self._fresh_cache_path("trips") is None:
+            # Kept so every join variant reuses one parse of the CSV
+            cache_key = f"{purpose}_trips_raw"
+            if cache_key not in self._cache:
+                print(f"Loading {purpose} trips...")
+                self._cache[cache_key] = self._read_filtered_csv(
+                    "trips", "destpurp1", [purpose]
+                )
+            return self._cache[cache_key]
+        return self.trips.take(self._trips_idx.get(purpose, []))
+
+    def _column_names(self, dataset: str) -> List[str]:
+        """
+        Get the column names of a dataset without loading it.
+        Reads the schema of a fresh Feather cache, else the CSV header.
+        Args:
+            dataset (str): Name of the dataset (e.g., 'households', 'persons').
+
+        Returns:
+            List[str]: Column names of the dataset.
+        """
+        cache_path = self._fresh_cache_path(dataset)
+        if cache_path is not None:
+            with pa.OSFile(cache_path, "rb") as source:
+                return pa.ipc.open_file(source).schema.names
+
+        header = pd.read_csv(self.data_path + self.dataset_info[dataset]["file"], nrows=0)
+        return header.columns.tolist()
+
     def load_columns(self, dataset: str, columns: List[str]) -> pd.DataFrame:
         """
         Load specific columns from a dataset to save memory.
@@ -124,12 +555,49 @@ class DataManager:
         if dataset not in self.dataset_info:
             raise ValueError(f"Dataset {dataset} not recognized.")
 
-        file_path = self.data_path + self.dataset_info[dataset]["file"]
         print(f"Loading columns {columns} from {dataset}...")
-        df = pd.read_csv(file_path, usecols=columns)
+        cache_path = self._fresh_cache_path(dataset)
+        if cache_path is not None:
+            df = self._read_cache(cache_path, columns, memory_map=self.memory_map)
+        else:
+            df = self._read_csv(dataset, columns)
         print(f"Loaded {len(df)} records from {dataset} with columns {columns}.")
         return df
 
+    def _select_trip_data(
+        self,
+        dataset: str,
+        columns: List[str],
+        trip_type: Optional[str],
+        use_cached_full_table: bool,
+    ) -> pd.DataFrame:
+        """
+        Select columns from trips or stops, optionally filtered by trip type.
+        Only the requested columns are read from disk, unless the full table is
+        requested or has already been loaded.
+        Args:
+            dataset (str): Either 'trips' or 'stops'.
+            columns (List[str]): Columns to select, must include 'destpurp1'.
+            trip_type (Optional[str]): Filter by trip type ('work' or 'education').
+            use_cached_full_table (bool): Whether to load and slice the full table.
+
+        Returns:
+            pd.DataFrame: DataFrame containing the selected columns.
+        """
+        purpose = {"work": "Work Related", "education": "Education"}.get(trip_type)
+
+        if use_cached_full_table or getattr(self, f"_{dataset}") is not None:
+            data = getattr(self, dataset)[columns]
+            if purpose is not None:
+                purpose_idx = self._trips_idx if dataset == "trips" else self._stops_idx
+                data = data.take(purpose_idx.get(purpose, []))
+        else:
+            data = self.load_columns(dataset, columns)
+            if purpose is not None:
+                data = data[data["destpurp1"] == purpose]
+
+        return data
+
     def get_work_trips(
         self, include_person_data: bool = False, include_household_data: bool = False
     ) -> pd.DataFrame:
@@ -146,51 +614,37 @@ class DataManager:
         if cache_key in self._cache:
             return self._cache[cache_key]
 
-        work_trips = self.trips[self.trips["destpurp1"] == "Work Related"].copy()
-        if include_person_data:
-            person_cols = [
-                "persid",
-                "agegroup",
-                "sex",
-                "carlicence",
-                "anywork",
-                "emptype",
-                "anzsco1",
-                "anzsco2",
-                "anzsic1",
-                "anzsic2",
-                "persinc",
-                "anywfh",
-            ]
-            work_trips = pd.merge(
-                work_trips, self.persons[person_cols], on="persid", how="left"
-            )
-
-        if include_household_data:
-            if "hhid" not in work_trips.columns:
-                work_trips = pd.merge(
-                    work_trips,
-                    self.persons[["persid", "hhid"]],
-                    on="persid",
-                    how="left",
-                )
-
-            household_cols = [
-                "hhid",
-                "hhinc_group",
-                "totalvehs",
-                "totalbikes",
-                "hhsize",
-                "dwelltype",
-                "owndwell",
-                "homelga",
-                "homesubregion_ASGS",
-                "homeregion_ASGS",
-            ]
-
-            work_trips = pd.merge(
-                work_trips, self.households[household_cols], on="hhid", how="left"
-            )
+        person_cols = [
+            "agegroup",
+            "sex",
+            "carlicence",
+            "anywork",
+            "emptype",
+            "anzsco1",
+            "anzsco2",
+            "anzsic1",
+            "anzsic2",
+            "persinc",
+            "anywfh",
+        ]
+        household_cols = [
+            "hhinc_group",
+            "totalvehs",
+            "totalbikes",
+            "hhsize",
+            "dwelltype",
+            "owndwell",
+            "homelga",
+            "homesubregion_ASGS",
+            "homeregion_ASGS",
+        ]
+
+        work_trips = self._purpose_trips("Work Related")
+        work_trips = self._join_person_household_data(
+            work_trips,
+            person_cols if include_person_data else [],
+            household_cols if include_household_data else [],
+        )
 
         self._cache[cache_key] = work_trips
         return work_trips
@@ -211,52 +665,79 @@ class DataManager:
         if cache_key in self._cache:
             return self._cache[cache_key]
 
-        education_trips = self.trips[self.trips["destpurp1"] == "Education"].copy()
-
         # Person data columns to be included
-        if include_person_data:
-            person_cols = [
-                "persid",
-                "agegroup",
-                "sex",
-                "studying",
-                "mainact",
-                "carlicence",
-                "relationship",
-            ]
-            education_trips = pd.merge(
-                education_trips, self.persons[person_cols], on="persid", how="left"
+        person_cols = [
+            "agegroup",
+            "sex",
+            "studying",
+            "mainact",
+            "carlicence",
+            "relationship",
+        ]
+        household_cols = [
+            "hhinc_group",
+            "totalvehs",
+            "totalbikes",
+            "hhsize",
+            "dwelltype",
+            "owndwell",
+            "homelga",
+            "youngestgroup_5",
+            "aveagegroup_5",
+            "oldestgroup_5",
+        ]
+
+        education_trips = self._purpose_trips("Education")
+        education_trips = self._join_person_household_data(
+            education_trips,
+            person_cols if include_person_data else [],
+            household_cols if include_household_data else [],
+        )
+
+        self._cache[cache_key] = education_trips
+        return education_trips
+
+    def _join_person_household_data(
+        self, trips: pd.DataFrame, person_cols: List[str], household_cols: List[str]
+    ) -> pd.DataFrame:
+        """
+        Join person and household columns onto trips by persid and hhid.
+        When both are requested, a single join against the pre-joined
+        persons and households table is used.
+        Args:
+            trips (pd.DataFrame): Trips to add columns to.
+            person_cols (List[str]): Person columns to add, may be empty.
+            household_cols (List[str]): Household columns to add, may be empty.
+
+        Returns:
+            pd.DataFrame: Trips with the requested columns joined.
+        """
+        join_args = {"how": "left", "lsuffix": "_x", "rsuffix": "_y", "validate": "m:1"}
+
+        if person_cols and household_cols:
+            if "hhid" not in trips.columns:
+                person_cols = person_cols + ["hhid"]
+            return trips.join(
+                self._persons_with_hh[person_cols + household_cols],
+                on="persid",
+                **join_args,
             )
 
-        if include_household_data:
-            if "hhid" not in education_trips.columns:
-                education_trips = pd.merge(
-                    education_trips,
-                    self.persons[["persid", ["hhid"]]],
-                    on="persid",
-                    how="left",
-                )
+        if person_cols:
+            trips = trips.join(
+                self._persons_indexed[person_cols], on="persid", **join_args
+            )
 
-            household_cols = [
-                "hhid",
-                "hhinc_group",
-                "totalvehs",
-                "totalbikes",
-                "hhsize",
-                "dwelltype",
-                "owndwell",
-                "homelga",
-                "youngestgroup_5",
-                "aveagegroup_5",
-                "oldestgroup_5",
-            ]
-
-            education_trips = pd.merge(
-                education_trips, self.households[household_cols], on="hhid", how="left"
+        if household_cols:
+            if "hhid" not in trips.columns:
+                trips = trips.join(
+                    self._persons_indexed[["hhid"]], on="persid", **join_args
+                )
+            trips = trips.join(
+                self._households_indexed[household_cols], on="hhid", **join_args
             )
 
-        self._cache[cache_key] = education_trips
-        return education_trips
+        return trips
 
     def get_journey_dict(self) -> Dict[str, pd.DataFrame]:
         """
@@ -272,32 +753,39 @@ class DataManager:
             return self._cache[cache_key]
 
         result = {
-            "work": self.journey_work.copy(),
-            "education": self.journey_education.copy(),
+            "work": self.journey_work,
+            "education": self.journey_education,
         }
 
-        result["work"] = pd.merge(
-            result["work"],
-            self.persons[["persid", "agegroup", "sex", "hhid"]],
+        result["work"] = result["work"].join(
+            self._persons_indexed[["agegroup", "sex", "hhid"]],
             on="persid",
             how="left",
+            lsuffix="_x",
+            rsuffix="_y",
+            validate="m:1",
         )
-        result["education"] = pd.merge(
-            result["education"],
-            self.persons[["persid", "agegroup", "sex", "hhid"]],
+        result["education"] = result["education"].join(
+            self._persons_indexed[["agegroup", "sex", "hhid"]],
             on="persid",
             how="left",
+            lsuffix="_x",
+            rsuffix="_y",
+            validate="m:1",
         )
 
         self._cache[cache_key] = result
 
         return result
 
-    def get_spatial_data(self, trip_type: Optional[str] = None) -> pd.DataFrame:
+    def get_spatial_data(
+        self, trip_type: Optional[str] = None, use_cached_full_table: bool = False
+    ) -> pd.DataFrame:
         """
         Get spatial data from stops dataset.
         Args:
             trip_type (Optional[str]): Filter by trip type ('work' or 'education').
+            use_cached_full_table (bool): Whether to slice the full stops table.
 
         Returns:
             pd.DataFrame: DataFrame containing spatial data.
@@ -306,19 +794,20 @@ class DataManager:
         spatial_cols = ['tripid', 'origlga', 'destlga', 'origplace1', 'origplace2',
                        'destplace1', 'destplace2', 'cumdist', 'destpurp1']
         
-        spatial_data = self.stops[spatial_cols].copy()
-        if trip_type == "work":
-            spatial_data = spatial_data[spatial_data["destpurp1"] == "Work Related"]
-        elif trip_type == "education":
-            spatial_data = spatial_data[spatial_data["destpurp1"] == "Education"]
+        spatial_data = self._select_trip_data(
+            "stops", spatial_cols, trip_type, use_cached_full_table
+        )
 
         return spatial_data
 
-    def get_temporal_data(self, trip_type: Optional[str] = None) -> pd.DataFrame:
+    def get_temporal_data(
+        self, trip_type: Optional[str] = None, use_cached_full_table: bool = False
+    ) -> pd.DataFrame:
         """
         Get temporal data from trips dataset.
         Args:
             trip_type (Optional[str]): Filter by trip type ('work' or 'education').
+            use_cached_full_table (bool): Whether to slice the full trips table.
 
         Returns:
             pd.DataFrame: DataFrame containing temporal data.
@@ -327,19 +816,20 @@ class DataManager:
         temporal_cols = ['tripid', 'startime', 'arrtime', 'travtime', 'triptime',
                         'starthour', 'arrhour', 'duration', 'dayType', 'destpurp1']
 
-        temporal_data = self.trips[temporal_cols].copy()
-        if trip_type == "work":
-            temporal_data = temporal_data[temporal_data["destpurp1"] == "Work Related"]
-        elif trip_type == "education":
-            temporal_data = temporal_data[temporal_data["destpurp1"] == "Education"]
+        temporal_data = self._select_trip_data(
+            "trips", temporal_cols, trip_type, use_cached_full_table
+        )
 
         return temporal_data
 
-    def get_modal_data(self, trip_type: Optional[str] = None) -> pd.DataFrame:
+    def get_modal_data(
+        self, trip_type: Optional[str] = None, use_cached_full_table: bool = False
+    ) -> pd.DataFrame:
         """
         Get modal data from trips dataset, including multi-model information.
         Args:
             trip_type (Optional[str]): Filter by trip type ('work' or 'education').
+            use_cached_full_table (bool): Whether to slice the full trips table.
         Returns:
             pd.DataFrame: DataFrame containing modal data.
         """
@@ -350,25 +840,30 @@ class DataManager:
         
         modal_cols = ['tripid', 'linkmode', 'destpurp1'] + modes + times + dists
 
-        modal_data = self.trips[modal_cols].copy()
-
-        if trip_type == "work":
-            modal_data = modal_data[modal_data["destpurp1"] == "Work Related"]
-        elif trip_type == "education":
-            modal_data = modal_data[modal_data["destpurp1"] == "Education"]
+        modal_data = self._select_trip_data(
+            "trips", modal_cols, trip_type, use_cached_full_table
+        )
 
         # Add multi-modal information - count non-null modes
+        # Unused legs are recorded as "Not applicable" rather than left empty
         existing_mode_cols = [col for col in modes if col in modal_data.columns]
-        modal_data['is_multimodal'] = modal_data[existing_mode_cols].notna().sum(axis=1) > 1
-        modal_data['num_modes'] = modal_data[existing_mode_cols].notna().sum(axis=1)
+        mode_values = modal_data[existing_mode_cols]
+        modes_used = (mode_values.notna() & mode_values.ne("Not applicable")).to_numpy(
+            dtype=np.int8
+        )
+        num_modes = modes_used.sum(axis=1, dtype=np.int8)
+        modal_data = modal_data.assign(is_multimodal=num_modes > 1, num_modes=num_modes)
 
         return modal_data
 
-    def get_stop_data(self, trip_type: Optional[str] = None) -> pd.DataFrame:
+    def get_stop_data(
+        self, trip_type: Optional[str] = None, use_cached_full_table: bool = False
+    ) -> pd.DataFrame:
         """
         Get stop-level data for further analysis.
         Args:
             trip_type (Optional[str]): Filter by trip type ('work' or 'education').
+            use_cached_full_table (bool): Whether to slice the full stops table.
         Returns:
             pd.DataFrame: DataFrame containing stop data.
         """
@@ -377,12 +872,9 @@ class DataManager:
             'origplace1', 'origplace2', 'destplace1', 'destplace2',
             'origlga', 'destlga', 'mainmode', 'destpurp1',
             'startime', 'arrtime', 'deptime', 'travtime', 'vistadist', 'duration']
-        stop_data = self.stops[stop_cols].copy()
-
-        if trip_type == "work":
-            stop_data = stop_data[stop_data["destpurp1"] == "Work Related"]
-        elif trip_type == "education":
-            stop_data = stop_data[stop_data["destpurp1"] == "Education"]
+        stop_data = self._select_trip_data(
+            "stops", stop_cols, trip_type, use_cached_full_table
+        )
 
         return stop_data
     
@@ -395,38 +887,39 @@ class DataManager:
             pd.DataFrame: DataFrame containing journey segments data.
         """
         if journey_type == "work":
-            journey_df = self.journey_work.copy()
+            journey_df = self.journey_work
         else:
-            journey_df = self.journey_education.copy()
-
-        segments = []
-
-        for idx, row in journey_df.iterrows():
-            journey_id = row['jtwid'] if journey_type == 'work' else row['jteid']
-
-            for i in range(1, 16):
-                mode_col = f'mainmode_desc_{i:02d}'
-                time_col = f'travtime_{i:02d}'
-                dist_col = f'vistadist_{i}'
-                start_col = f'starttime_{i:02d}'
-                arr_col = f'arrtime_{i:02d}'
-
-                if pd.notna(row.get(mode_col)):
-                    segments.append({
-                        'journey_id': journey_id,
-                        'persid': row['persid'],
-                        'hhid': row['hhid'],
-                        'segment_no': i,
-                        'mode': row.get(mode_col),
-                        'travel_time': row.get(time_col),
-                        'distance': row.get(dist_col),
-                        'start_time': row.get(start_col),
-                        'arrival_time': row.get(arr_col),
-                        'journey_type': journey_type,
-                        'main_journey_mode': row.get('main_journey_mode'), 
-                        'journey_travel_time': row.get('journey_travel_time')
-                    })
-        return pd.DataFrame(segments)
+            journey_df = self.journey_education
+
+        journey_id_col = 'jtwid' if journey_type == 'work' else 'jteid'
+        id_cols = [journey_id_col, 'persid', 'hhid', 'main_journey_mode', 'journey_travel_time']
+
+        # Segment columns are stored wide as <stub>_01 ... <stub>_15
+        segment_stubs = {
+            'mainmode_desc': 'mode',
+            'travtime': 'travel_time',
+            'vistadist': 'distance',
+            'startime': 'start_time',
+            'arrtime': 'arrival_time',
+        }
+        stub_cols = {stub: [f'{stub}_{i:02d}' for i in range(1, 16)] for stub in segment_stubs}
+
+        # Row and segment positions of every used segment, in row-major order
+        valid = journey_df[stub_cols['mainmode_desc']].notna().to_numpy()
+        rows, segs = np.nonzero(valid)
+
+        segments = journey_df[id_cols].take(rows).reset_index(drop=True)
+        segments = segments.rename(columns={journey_id_col: 'journey_id'})
+        segments['segment_no'] = segs + 1
+        for stub, name in segment_stubs.items():
+            segments[name] = journey_df[stub_cols[stub]].to_numpy()[rows, segs]
+        segments['journey_type'] = journey_type
+
+        return segments[[
+            'journey_id', 'persid', 'hhid', 'segment_no', 'mode', 'travel_time',
+            'distance', 'start_time', 'arrival_time', 'journey_type',
+            'main_journey_mode', 'journey_travel_time'
+        ]]
     
     def get_unique_values(self, dataset: str, column: str) -> pd.Series:
         """
@@ -439,7 +932,14 @@ class DataManager:
             List: A list of unique values from the specified column.
         """
 
-        data = getattr(self, dataset)
+        # Only read the one column when the dataset has not been loaded yet
+        if dataset in self.dataset_info and getattr(self, f"_{dataset}") is None:
+            if column not in self._column_names(dataset):
+                raise ValueError(f"Column {column} not found in dataset {dataset}.")
+            data = self.load_columns(dataset, [column])
+        else:
+            data = getattr(self, dataset)
+
         if column in data.columns:
             return data[column].value_counts()
         else:
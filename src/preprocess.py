@@ -4,11 +4,26 @@ This file contains a class that will preprocess the "data/raw_data" files and ou
 
 import pandas as pd
 import numpy as np
-from typing import Dict
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+from typing import Callable, Dict, List
 from models import DataManager
 import re
 import os
 
+# Yearly bounds of an income group, eg. "($78,000-$90,999)"
+_BRACKET_RE = re.compile(r"\(\$([\d,]+)-\$([\d,]+)\)")
+# Marks the open-ended top income group
+_OR_MORE = "or more"
+
+# Labels shared by the trip distance, trip duration and journey distance bins
+_DISTANCE_LABELS = [
+    "Short (0-10]",
+    "Medium (10-20]",
+    "Long (20-40]",
+    "Very Long (40+)",
+]
+
 
 class Preprocess:
     """
@@ -26,125 +41,135 @@ class Preprocess:
         self.dm = data_manager
         self.processed_data = {}
 
+    def _memo(self, name: str, prep: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Get a processed dataset, running its prep step only if it has not run yet.
+
+        Args:
+            name (str): Key of the dataset in processed_data.
+            prep (Callable): Prep step that stores the dataset under name.
+
+        Returns:
+            pd.DataFrame: The processed dataset.
+        """
+        if name not in self.processed_data:
+            prep()
+        return self.processed_data[name]
+
     @staticmethod
-    def _to_float(val):
-        if val == "Missing":
-            return None
-        return float(val)
+    def _to_cat(df: pd.DataFrame, cols: List[str]) -> None:
+        """Store low-cardinality label columns as categoricals, in place."""
+        df[cols] = df[cols].astype("category")
 
     @staticmethod
-    def _find_avg_yearly(val):
+    def _downcast(df: pd.DataFrame, cols: List[str]) -> None:
+        """Store numeric columns in the smallest dtype that holds their values, in place."""
+        for col in cols:
+            values = df[col]
+            is_integral = values.notna().all() and (values % 1 == 0).all()
+            df[col] = pd.to_numeric(values, downcast="integer" if is_integral else "float")
+
+    @staticmethod
+    def _bracket_midpoint(groups: pd.Series) -> pd.Series:
         """
-        Find the yearly average of grouped income group.
+        Find the mean of the yearly bracket of grouped incomes.
 
         Args:
-            val (str): income group that comes in format "$1,500-$1,749 ($78,000-$90,999)"
+            groups (pd.Series): income groups that come in format "$1,500-$1,749 ($78,000-$90,999)"
 
         Returns:
-            int: A single value that is the mean of the values in the bracket "()"
+            pd.Series: The mean of the values in the bracket "()", NaN where there is no bracket
         """
-        if pd.isna(val):
-            return None
+        bounds = groups.str.extract(_BRACKET_RE, expand=True)
+        low = bounds[0].str.replace(",", "", regex=False).astype("float64")
+        high = bounds[1].str.replace(",", "", regex=False).astype("float64")
+        return (low + high) // 2
 
-        text = str(val)
+    @staticmethod
+    def _find_avg_yearly(groups: pd.Series) -> pd.Series:
+        """
+        Find the yearly average of grouped income group.
 
-        # Handle "or more" case eg. $8,000 or more ($416,000 or more)
-        if "or more" in text:
-            return 450000
+        Args:
+            groups (pd.Series): income groups that come in format "$1,500-$1,749 ($78,000-$90,999)"
 
-        match = re.search(r"\(\$([\d,]+)-\$([\d,]+)\)", text)
-        if match:
-            low = int(match.group(1).replace(",", ""))
-            high = int(match.group(2).replace(",", ""))
-            avg = int((low + high) / 2)
-            return avg
+        Returns:
+            pd.Series: A single value per group that is the mean of the values in the bracket "()"
+        """
+        avg = Preprocess._bracket_midpoint(groups)
 
-        return None
+        # Handle "or more" case eg. $8,000 or more ($416,000 or more)
+        avg[groups.str.contains(_OR_MORE, regex=False, na=False)] = 450000
+        return avg
 
     @staticmethod
-    def _personal_income(text: str):
+    def _personal_income(groups: pd.Series) -> pd.Series:
         """Find category for personal income"""
+        avg = Preprocess._bracket_midpoint(groups)
+
         # nil income for negative income, let it be 0
-        if "Negative income" == text:
-            return 0
-        if text == "Nil income":
-            return None
-        if "or more" in text:
-            return 200000
-
-        match = re.search(r"\(\$([\d,]+)-\$([\d,]+)\)", text)
-        if match:
-            low = int(match.group(1).replace(",", ""))
-            high = int(match.group(2).replace(",", ""))
-            avg = int((low + high) / 2)
-            return avg
-
-        return None
+        avg[groups == "Negative income"] = 0
+        avg[groups.str.contains(_OR_MORE, regex=False, na=False)] = 200000
+        return avg
 
     @staticmethod
-    def _categorise_melbourne_zone(subregion: str) -> str:
+    def _categorise_melbourne_zone(subregion: pd.Series) -> np.ndarray:
         """Categorise Melbourne zones."""
-        if pd.isna(subregion):
-            return "Unknown"
-        subregion = str(subregion)
-        if "Inner" in subregion:
-            return "Inner"
-        elif "Middle" in subregion:
-            return "Middle"
-        elif "Outer" in subregion:
-            return "Outer"
-        elif "Melbourne" not in subregion:
-            return "Regional"
-        else:
-            return "Other"
+        return np.select(
+            [
+                subregion.isna(),
+                subregion.str.contains("Inner", regex=False, na=False),
+                subregion.str.contains("Middle", regex=False, na=False),
+                subregion.str.contains("Outer", regex=False, na=False),
+                ~subregion.str.contains("Melbourne", regex=False, na=False),
+            ],
+            ["Unknown", "Inner", "Middle", "Outer", "Regional"],
+            default="Other",
+        )
 
     @staticmethod
-    def _convert_age_to_decade(age_str: str) -> str:
+    def _convert_age_to_decade(age_groups: pd.Series) -> pd.Series:
         """Convert 5-years groups into 10-years groups"""
-        if age_str == "100+":
-            return "100+"
-        start_age_str = age_str.split("->")[0]
-        start_age = int(start_age_str)
+        is_top = age_groups.eq("100+")
+        start_age = age_groups.str.split("->", n=1).str[0].where(~is_top, "100").astype(int)
 
         decade_start = (start_age // 10) * 10
         decade_end = decade_start + 9
 
-        return f"{decade_start}->{decade_end}"
+        decades = decade_start.astype(str) + "->" + decade_end.astype(str)
+        return decades.where(~is_top, "100+")
 
-    def _categorise_emp_status(self, row) -> str:
+    @staticmethod
+    def _categorise_emp_status(persons: pd.DataFrame) -> np.ndarray:
         """Categorise employment status."""
-        if row["fulltimework"] == "Yes":
-            return "Full-time"
-        elif row["parttimework"] == "Yes":
-            return "Part-time"
-        elif row["casualwork"] == "Yes":
-            return "Casual"
-        elif row["studying"] != "No Study":
-            return "Student"
-        elif row["activities"] == "Retired":
-            return "Retired"
-        else:
-            return "Not Working"
+        return np.select(
+            [
+                persons["fulltimework"].eq("Yes"),
+                persons["parttimework"].eq("Yes"),
+                persons["casualwork"].eq("Yes"),
+                persons["studying"].ne("No Study"),
+                persons["activities"].eq("Retired"),
+            ],
+            ["Full-time", "Part-time", "Casual", "Student", "Retired"],
+            default="Not Working",
+        )
 
     @staticmethod
-    def _categorise_life_stage(row) -> str:
+    def _categorise_life_stage(persons: pd.DataFrame) -> np.ndarray:
         """Categorise life stage based on age and activity."""
-        age = row["age_decade"]
-        if age in ["0-10", "10-20"]:
-            return "Youth"
-        elif row["studying"] != "No Study":
-            return "Student"
-        elif row["anywork"] == "Yes" and age in ["20-30", "30-40", "40-50", "50-60"]:
-            return "Working Adult"
-        elif row["activities"] == "Retired" or age in [
-            "60-70",
-            "70-80",
-            "80-90",
-            "90+",
-        ]:
-            return "Retired/Senior"
-        else:
-            return "Other"
+        age = persons["age_decade"]
+        return np.select(
+            [
+                age.isin(["0-10", "10-20"]),
+                persons["studying"].ne("No Study"),
+                persons["anywork"].eq("Yes")
+                & age.isin(["20-30", "30-40", "40-50", "50-60"]),
+                persons["activities"].eq("Retired")
+                | age.isin(["60-70", "70-80", "80-90", "90+"]),
+            ],
+            ["Youth", "Student", "Working Adult", "Retired/Senior"],
+            default="Other",
+        )
 
     @staticmethod
     def _categorise_licence_freedom(row) -> str:
@@ -175,11 +200,8 @@ class Preprocess:
             return "Limited"
 
     @staticmethod
-    def _categorise_trip_purpose(purp) -> str:
+    def _categorise_trip_purpose(purp: pd.Series) -> np.ndarray:
         """Categorised trip purposes into more general categories"""
-        if pd.isna(purp):
-            return "Unknown"
-
         mandatory = ["Work Related", "Education"]
         maintenance = [
             "Buy Something",
@@ -189,23 +211,21 @@ class Preprocess:
             "Accompany Someone",
         ]
         discretionary = ["Social", "Recreational"]
-        if purp == "At Home":
-            return "Home"
-        elif purp in mandatory:
-            return "Mandatory"
-        elif purp in maintenance:
-            return "Maintenance"
-        elif purp == discretionary:
-            return "Discretionary"
-        else:
-            return "Other"
+        return np.select(
+            [
+                purp.isna(),
+                purp.eq("At Home"),
+                purp.isin(mandatory),
+                purp.isin(maintenance),
+                purp.isin(discretionary),
+            ],
+            ["Unknown", "Home", "Mandatory", "Maintenance", "Discretionary"],
+            default="Other",
+        )
 
     @staticmethod
-    def _categorise_trip_mode(mode) -> str:
+    def _categorise_trip_mode(mode: pd.Series) -> np.ndarray:
         """Categorise transport modes into more general categories"""
-        if pd.isna(mode):
-            return "Unknown"
-
         public = ["Public Bus", "School Bus", "Train", "Tram"]
         private = [
             "Vehicle Driver",
@@ -221,15 +241,16 @@ class Preprocess:
             "Mobility Scooter",
             "e-Scooter",
         ]
-
-        if mode in public:
-            return "Public"
-        elif mode in private:
-            return "Private"
-        elif mode in active:
-            return "Active"
-        else:
-            return "Other"
+        return np.select(
+            [
+                mode.isna(),
+                mode.isin(public),
+                mode.isin(private),
+                mode.isin(active),
+            ],
+            ["Unknown", "Public", "Private", "Active"],
+            default="Other",
+        )
 
     def get_unique_values(self, dataset: str, column: str) -> pd.Series:
         """
@@ -256,11 +277,12 @@ class Preprocess:
             pd.DataFrame: Preprocessed households DataFrame
         """
 
-        households = self.dm.households.copy()
+        # Shallow copy, new columns are added to it while copy-on-write
+        # keeps the DataManager's table untouched
+        households = self.dm.households.copy(deep=False)
 
         # Create household_income column and fill missing values with mean income
-        hhinc_group = households["hhinc_group"]
-        hhinc_group = hhinc_group.apply(self._find_avg_yearly)
+        hhinc_group = self._find_avg_yearly(households["hhinc_group"])
         mean_yearly = hhinc_group.mean()
         hhinc_group = hhinc_group.fillna(mean_yearly)
         households["household_income"] = hhinc_group
@@ -269,7 +291,7 @@ class Preprocess:
         # Categorised into 6 groups: ['Low', 'Lower-middle', 'Middle', 'Upper-middle', 'High', 'Very high']
         households["income_bracket"] = pd.cut(
             households["household_income"],
-            bins=[0, 25000, 50000, 100000, 150000, 250000, float("inf")],
+            bins=[0, 25000, 50000, 100000, 150000, 250000, np.inf],
             labels=[
                 "Low (0 - 25000]",
                 "Lower-middle (25000 - 50000]",
@@ -288,16 +310,16 @@ class Preprocess:
         # Categorised by vehicle availability
         households["vehicle_availability"] = pd.cut(
             households["vehicle_per_person"],
-            bins=[-0.1, 0.5, 1, 1.5, float("inf")],
+            bins=[-0.1, 0.5, 1, 1.5, np.inf],
             labels=["Limited", "Moderate", "Adequate", "Abundant"],
         )
 
         # Categorised based on household types ['has_young_children', 'has_teenagers']
-        households["has_young_children"] = households["youngestgroup_5"].apply(
-            lambda x: 1 if x in ["0->4", "5->9"] else 0
+        households["has_young_children"] = (
+            households["youngestgroup_5"].isin(["0->4", "5->9"]).astype(np.int8)
         )
-        households["has_teenagers"] = households["youngestgroup_5"].apply(
-            lambda x: 1 if x in ["10->14", "15->20"] else 0
+        households["has_teenagers"] = (
+            households["youngestgroup_5"].isin(["10->14", "15->20"]).astype(np.int8)
         )
 
         # Categorised by hosuehold size
@@ -314,15 +336,20 @@ class Preprocess:
         )
 
         # Categorised by region: City or Regional area
-        households["is_city"] = households["homeregion_ASGS"].apply(
-            lambda x: 1 if "Melbourne" in str(x) else 0
+        households["is_city"] = (
+            households["homeregion_ASGS"]
+            .str.contains("Melbourne", regex=False, na=False)
+            .astype(np.int8)
         )
 
         # Categorised by zones: Inner, Middle, Outer
-        households["zone"] = households["homesubregion_ASGS"].apply(
-            self._categorise_melbourne_zone
+        households["zone"] = self._categorise_melbourne_zone(
+            households["homesubregion_ASGS"]
         )
 
+        self._to_cat(households, ["zone"])
+        self._downcast(households, ["household_income", "vehicle_per_person"])
+
         self.processed_data["households"] = households
         print(f"Household preprocessing complete. Shape: {households.shape}")
         return households
@@ -333,10 +360,10 @@ class Preprocess:
         Returns:
             pd.DataFrame: Preprocessed households DataFrame
         """
-        persons = self.dm.persons.copy()
+        persons = self.dm.persons.copy(deep=False)
 
         # Convert 5-years age group into decades
-        persons["age_decade"] = persons["agegroup"].apply(self._convert_age_to_decade)
+        persons["age_decade"] = self._convert_age_to_decade(persons["agegroup"])
         # Counting the total number of WFH days
         wfh_columns = [
             "wfhmon",
@@ -348,10 +375,10 @@ class Preprocess:
             "wfhsun",
         ]
         # Convert from 'Yes' to 1, 'No' or 'Not in Workforce' to 0
-        for col in wfh_columns:
-            persons[col] = persons[col].apply(lambda x: 1 if x == "Yes" else 0)
+        persons[wfh_columns] = (persons[wfh_columns].to_numpy() == "Yes").astype(np.int8)
 
-        persons["total_wfh_days"] = persons[wfh_columns].sum(axis=1)
+        # At most 7 days, fits in int8
+        persons["total_wfh_days"] = persons[wfh_columns].sum(axis=1).astype(np.int8)
 
         # Categorised by WFH days:
         # Never (0 days),
@@ -365,15 +392,13 @@ class Preprocess:
         )
 
         # Categorised by employment status
-        persons["employment_status"] = persons.apply(
-            self._categorise_emp_status, axis=1
-        )
+        persons["employment_status"] = self._categorise_emp_status(persons)
 
         # Categorised by life stage
-        persons["life_stage"] = persons.apply(self._categorise_life_stage, axis=1)
+        persons["life_stage"] = self._categorise_life_stage(persons)
 
         # Categorised by personal income and fill missing values with mean
-        persons["personal_income"] = persons["persinc"].apply(self._personal_income)
+        persons["personal_income"] = self._personal_income(persons["persinc"])
         mean_personal_income = int(persons["personal_income"].mean())
         persons["personal_income"] = persons["personal_income"].fillna(
             mean_personal_income
@@ -394,6 +419,19 @@ class Preprocess:
         # Categorised by licence, or degree of freedom
         persons["mobility"] = persons.apply(self._categorise_licence_freedom, axis=1)
 
+        self._to_cat(
+            persons,
+            [
+                "agegroup",
+                "age_decade",
+                "employment_status",
+                "life_stage",
+                "car_mobility",
+                "mobility",
+            ],
+        )
+        self._downcast(persons, ["personal_income"])
+
         self.processed_data["persons"] = persons
         return persons
 
@@ -405,20 +443,17 @@ class Preprocess:
             pd.DataFrame: Preprocessed trips DataFrame
         """
 
-        trips = self.dm.trips.copy()
+        trips = self.dm.trips.copy(deep=False)
 
         # Normalise from Minutes from midnight to Hours
         trips["start_hour"] = trips["startime"] / 60
         trips["arr_hour"] = trips["arrtime"] / 60
 
         # Categorised by peak hours:
-        trips["is_morning_peak"] = trips["start_hour"].apply(
-            lambda x: 1 if 7 <= x <= 9 else 0
-        )
-        trips["is_evening_peak"] = trips["start_hour"].apply(
-            lambda x: 1 if 17 <= x <= 19 else 0
-        )
-        trips["is_peak_hour"] = trips["is_morning_peak"] | trips["is_morning_peak"]
+        start_hour = trips["start_hour"].to_numpy()
+        trips["is_morning_peak"] = ((start_hour >= 7) & (start_hour <= 9)).astype(np.int8)
+        trips["is_evening_peak"] = ((start_hour >= 17) & (start_hour <= 19)).astype(np.int8)
+        trips["is_peak_hour"] = trips["is_morning_peak"] | trips["is_evening_peak"]
 
         # Categorised by time of day:
         trips["time_of_day"] = pd.cut(
@@ -436,45 +471,36 @@ class Preprocess:
         )
 
         # Convert dsitance into floats, and fill in missing values with median distance
-        trips["cumdist"] = trips["cumdist"].apply(self._to_float)
+        trips["cumdist"] = pd.to_numeric(trips["cumdist"], errors="coerce")
         median_distance = trips["cumdist"].median()
         trips["cumdist"] = trips["cumdist"].fillna(median_distance)
 
         # Categorised by trip distance
         trips["distance_category"] = pd.cut(
             trips["cumdist"],
-            bins=[0, 10, 20, 40, float("inf")],
-            labels=[
-                "Short (0-10]",
-                "Medium (10-20]",
-                "Long (20-40]",
-                "Very Long (40+)",
-            ],
+            bins=[0, 10, 20, 40, np.inf],
+            labels=_DISTANCE_LABELS,
         )
 
         # Categorised by trip purpose
-        trips["purpose_category"] = trips["destpurp1"].apply(
-            self._categorise_trip_purpose
-        )
+        trips["purpose_category"] = self._categorise_trip_purpose(trips["destpurp1"])
 
         # CAtegorised by mode of transport
-        trips["mode_category"] = trips["linkmode"].apply(self._categorise_trip_mode)
+        trips["mode_category"] = self._categorise_trip_mode(trips["linkmode"])
 
         # Convert into numerical values
-        trips["travtime"] = trips["travtime"].apply(self._to_float)
+        trips["travtime"] = pd.to_numeric(trips["travtime"], errors="coerce")
 
         # Categorised by trip duration
         trips["duration_category"] = pd.cut(
             trips["travtime"],
-            bins=[0, 10, 20, 40, float("inf")],
-            labels=[
-                "Short (0-10]",
-                "Medium (10-20]",
-                "Long (20-40]",
-                "Very Long (40+)",
-            ],
+            bins=[0, 10, 20, 40, np.inf],
+            labels=_DISTANCE_LABELS,
         )
 
+        self._to_cat(trips, ["destpurp1", "linkmode", "purpose_category", "mode_category"])
+        self._downcast(trips, ["start_hour", "arr_hour", "cumdist", "travtime"])
+
         self.processed_data["trips"] = trips
         return trips
 
@@ -487,8 +513,8 @@ class Preprocess:
             and 'Education' key represents journey_to_education data
         """
 
-        jtw = self.dm.journey_work.copy()
-        jte = self.dm.journey_education.copy()
+        jtw = self.dm.journey_work.copy(deep=False)
+        jte = self.dm.journey_education.copy(deep=False)
 
         jtw["journey_type"] = "Work"
         jte["journey_type"] = "Education"
@@ -501,7 +527,7 @@ class Preprocess:
 
             # Categorised journey by number of stops (complexity)
             columns_name = [f"mainmode_desc_{i:02d}" for i in range(1, 16)]
-            journey["num_stops"] = journey[columns_name].notna().sum(axis=1)
+            journey["num_stops"] = journey[columns_name].count(axis=1).astype(np.int8)
 
             journey["journey_complexity"] = pd.cut(
                 journey["num_stops"],
@@ -514,25 +540,27 @@ class Preprocess:
             journey["jdist"] = pd.to_numeric(
                 journey["journey_distance"], errors="coerce"
             )
-            journey["jdist"] = journey["jdist"].apply(lambda x: 0 if x < 0 else x)
+            journey["jdist"] = journey["jdist"].clip(lower=0)
 
             journey["journey_distance_category"] = pd.cut(
                 journey["jdist"],
-                bins=[0, 10, 20, 40, float("inf")],
-                labels=[
-                    "Short (0-10]",
-                    "Medium (10-20]",
-                    "Long (20-40]",
-                    "Very Long (40+)",
-                ],
+                bins=[0, 10, 20, 40, np.inf],
+                labels=_DISTANCE_LABELS,
             )
 
             # Convert time from minutes to hours
             journey["start_hour"] = journey["start_time"] / 60
             journey["end_hour"] = journey["end_time"] / 60
 
-            journey["starts_in_peak_hour"] = journey["start_hour"].apply(
-                lambda x: 1 if (7 <= x <= 9) or (17 <= x <= 19) else 0
+            start_hour = journey["start_hour"].to_numpy()
+            journey["starts_in_peak_hour"] = (
+                ((start_hour >= 7) & (start_hour <= 9))
+                | ((start_hour >= 17) & (start_hour <= 19))
+            ).astype(np.int8)
+
+            self._to_cat(journey, ["journey_type"])
+            self._downcast(
+                journey, ["journey_travel_hours", "jdist", "start_hour", "end_hour"]
             )
 
         self.processed_data["journey_work"] = jtw
@@ -544,63 +572,39 @@ class Preprocess:
         Calculate trips metrics and merge with persons table
         """
 
-        if "persons" not in self.processed_data:
-            self.prep_persons()
-        if "trips" not in self.processed_data:
-            self.prep_trips
-
-        persons = self.processed_data["persons"]
-        trips = self.processed_data["trips"]
+        persons = self._memo("persons", self.prep_persons)
+        trips = self._memo("trips", self.prep_trips)
 
-        # Calculate travelling summary for each person
+        # Calculate travelling summary for each person, including the number
+        # of work and education trips, in a single pass over the trips
         trip_summary = (
-            trips.groupby("persid")
-            .agg(
-                {
-                    "tripid": "count",
-                    "cumdist": "sum",
-                    "travtime": "sum",
-                    "is_peak_hour": "sum",
-                }
+            trips[["persid", "tripid", "cumdist", "travtime", "is_peak_hour"]]
+            .assign(
+                is_work=trips["destpurp1"].eq("Work Related").astype(np.int8),
+                is_edu=trips["destpurp1"].eq("Education").astype(np.int8),
             )
-            .rename(
-                columns={
-                    "tripid": "total_trips",
-                    "cumdist": "total_distance",
-                    "travtime": "total_travel_time",
-                    "is_peak_hour": "total_peak_hour_trips",
-                }
+            .groupby("persid", sort=False, observed=True)
+            .agg(
+                total_trips=("tripid", "count"),
+                total_distance=("cumdist", "sum"),
+                total_travel_time=("travtime", "sum"),
+                total_peak_hour_trips=("is_peak_hour", "sum"),
+                work_trips=("is_work", "sum"),
+                edu_trips=("is_edu", "sum"),
             )
         )
 
-        # Summarised by purpose, either work or education.
-        work_trips = (
-            trips[trips["destpurp1"] == "Work Related"]
-            .groupby("persid")["tripid"]
-            .count()
-        )
-        edu_trips = (
-            trips[trips["destpurp1"] == "Education"].groupby("persid")["tripid"].count()
+        # Some Ratios, divided as one block. Every summarised person has a
+        # trip, the guard only keeps a count of 0 from producing inf or NaN.
+        # People without trips get 0 from the fillna after the merge
+        total_trips = trip_summary["total_trips"].to_numpy()
+        totals = trip_summary[
+            ["total_peak_hour_trips", "total_distance", "total_travel_time"]
+        ].to_numpy(dtype=np.float64)
+        trip_summary[["peak_hour_ratio", "avg_trip_distance", "avg_trip_duration"]] = (
+            totals / np.maximum(total_trips, 1)[:, None]
         )
 
-        trip_summary["work_trips"] = work_trips
-        trip_summary["edu_trips"] = edu_trips
-        trip_summary.fillna(0, inplace=True)
-
-        # Some Ratios
-        trip_summary["peak_hour_ratio"] = (
-            trip_summary["total_peak_hour_trips"] / trip_summary["total_trips"]
-        )
-        trip_summary["avg_trip_distance"] = (
-            trip_summary["total_distance"] / trip_summary["total_trips"]
-        )
-        trip_summary["avg_trip_duration"] = (
-            trip_summary["total_travel_time"] / trip_summary["total_trips"]
-        )
-        # for people who don't have any trips
-        trip_summary = trip_summary.replace([np.inf, -np.inf], 0)
-        trip_summary.fillna(0, inplace=True)
-
         person_trips = pd.merge(
             persons, trip_summary, left_on="persid", right_index=True, how="left"
         )
@@ -617,13 +621,8 @@ class Preprocess:
         Create a master dataset by combining hosueholds, persons, and trips.
         """
 
-        if "households" not in self.processed_data:
-            self.prep_households()
-        if "persons_trips_summary" not in self.processed_data:
-            self.prep_person_trip()
-
-        households = self.processed_data["households"]
-        person_trips = self.processed_data["persons_trips_summary"]
+        households = self._memo("households", self.prep_households)
+        person_trips = self._memo("persons_trips_summary", self.prep_person_trip)
 
         # Features to include in the merged table
         hh_features = [
@@ -639,7 +638,9 @@ class Preprocess:
             "has_teenagers",
         ]
 
-        df = pd.merge(person_trips, households[hh_features], on="hhid", how="left")
+        df = pd.merge(
+            person_trips, households[hh_features], on="hhid", how="left", sort=False
+        )
 
         self.processed_data["master"] = df
         return df
@@ -649,16 +650,11 @@ class Preprocess:
         Create a dataset for comparision between journey_to_work and journey_to_education
         """
 
-        if "trips" not in self.processed_data:
-            self.prep_trips()
-        if "master" not in self.processed_data:
-            self.create_combined_dataset()
-
-        trips = self.processed_data["trips"]
-        master = self.processed_data["master"]
+        trips = self._memo("trips", self.prep_trips)
+        master = self._memo("master", self.create_combined_dataset)
 
-        work_trips = trips[trips["destpurp1"] == "Work Related"].copy()
-        edu_trips = trips[trips["destpurp1"] == "Education"].copy()
+        work_trips = trips[trips["destpurp1"] == "Work Related"]
+        edu_trips = trips[trips["destpurp1"] == "Education"]
 
         master_work_cols = [
             "persid",
@@ -683,10 +679,10 @@ class Preprocess:
         ]
 
         work_trips = pd.merge(
-            work_trips, master[master_work_cols], on="persid", how="left"
+            work_trips, master[master_work_cols], on="persid", how="left", sort=False
         )
         edu_trips = pd.merge(
-            edu_trips, master[master_edu_cols], on="persid", how="left"
+            edu_trips, master[master_edu_cols], on="persid", how="left", sort=False
         )
 
         compare_data = {
@@ -698,10 +694,29 @@ class Preprocess:
         self.processed_data.update(compare_data)
         return compare_data
 
-    def save_processed_data(self):
+    @staticmethod
+    def _write_csv(df: pd.DataFrame, file_path: str) -> None:
+        """
+        Write a DataFrame to CSV with pyarrow's multithreaded writer.
+        Falls back to pandas for columns pyarrow cannot convert.
+
+        Args:
+            df (pd.DataFrame): DataFrame to write.
+            file_path (str): Destination file path.
+        """
+        try:
+            pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), file_path)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            df.to_csv(file_path, index=False, lineterminator="\n", chunksize=100_000)
+
+    def save_processed_data(self, format: str = "parquet"):
         """
         Save preprocessed data into the "data/processed_data' folder
+        Args:
+            format (str): File format, 'parquet' (zstd compressed, keeps dtypes) or 'csv'.
         """
+        if format not in ("parquet", "csv"):
+            raise ValueError(f"Unsupported format {format}.")
 
         cur_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.data_path = os.path.join(cur_dir, "data/processed_data") + os.sep
@@ -709,8 +724,11 @@ class Preprocess:
         os.makedirs(self.data_path, exist_ok=True)
 
         for name, df in self.processed_data.items():
-            file_path = self.data_path + name + "_processed.csv"
-            df.to_csv(file_path, index=False)
+            file_path = self.data_path + name + "_processed." + format
+            if format == "parquet":
+                df.to_parquet(file_path, engine="pyarrow", compression="zstd", index=False)
+            else:
+                self._write_csv(df, file_path)
             print(f"Saved {name} to {file_path}")
     
 
@@ -719,6 +737,10 @@ def main():
     print("preprocessing.py")
 
     dm = DataManager()
+    # Only the datasets the prep steps use, stops is never read here
+    dm.prefetch_all(
+        ["households", "persons", "trips", "journey_work", "journey_education"]
+    )
     preprocessor = Preprocess(dm)
     households = preprocessor.prep_households()
     persons = preprocessor.prep_persons()